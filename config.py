@@ -48,6 +48,101 @@ GENERATION_CONFIG = {
 # - 'gemini-2.0-pro-exp-02-05': Experimental version with potential improvements
 MODEL_NAME = 'gemini-2.0-flash'
 
+# Model routing configuration
+# When enabled, each request is routed to the cheapest model that is expected
+# to answer within the latency SLO, based on live latency/error statistics and
+# a cheap estimate of how complex the captured image is.
+# - Default: False, every request uses MODEL_NAME
+# - Set to True to let the router choose from ROUTER_MODELS instead
+ROUTER_ENABLED = False
+
+# Candidate models, ordered from cheapest to most expensive
+# The value is the assumed latency (seconds) before any live samples exist
+ROUTER_MODELS = {
+    'gemini-2.0-flash-lite': 0.8,
+    'gemini-2.0-flash': 1.0,
+    'gemini-2.0-pro-exp-02-05': 3.0,
+}
+
+# Latency SLO (seconds): the router picks the cheapest model predicted to stay below it
+# - If no model is predicted to meet it, the fastest predicted model is used
+ROUTER_LATENCY_SLO = 2.0
+
+# Models whose recent error rate (0.0 - 1.0) exceeds this are skipped
+ROUTER_MAX_ERROR_RATE = 0.5
+
+# Seconds after which a model skipped for errors is tried again
+ROUTER_PROBE_INTERVAL = 60
+
+# Incremental OCR configuration
+# The capture area is split into row bands at rows without text; on every
+# preview tick only bands whose pixels changed are re-recognized with
+# Tesseract. The extracted text feeds the router's complexity estimate, so
+# OCR only runs when ROUTER_ENABLED is also True.
+# - Default: False, since it keeps several CPU cores busy while the app runs
+# Requires the Tesseract binary to be installed; OCR disables itself if it is missing.
+OCR_ENABLED = False
+
+# Maximum band height in pixels
+# - Taller blocks are split at their row with the least text
+OCR_MAX_BAND_HEIGHT = 160
+
+# Number of worker processes for tile OCR (None = one per CPU core)
+OCR_WORKERS = None
+
+# Request batching configuration
+# Captures that queue up close together are sent as one multi-image request
+# and the indexed answers are split back to each capture. If the response
+# cannot be parsed, the affected captures fall back to individual requests.
+# - BATCH_MAX_SIZE: maximum captures per request (1 disables batching)
+# - BATCH_MAX_WAIT_MS: how long the first capture waits for others that are
+#   already queued or being captured (a lone capture is sent immediately)
+# - Default: 1, since the single capture area never has more than one
+#   capture pending; raise it when feeding captures from several sources
+BATCH_MAX_SIZE = 1
+BATCH_MAX_WAIT_MS = 20
+
+# Instructions appended to GEMINI_PROMPT for multi-image requests
+# {count} is replaced with the number of images in the batch
+BATCH_PROMPT = """You will receive {count} numbered images. Answer each image independently using the rules above.
+Respond with exactly one line per image in the form '<number>: <answer>', for example:
+1: APPLE
+2: 42"""
+
+# Responsiveness diagnostics
+# The watchdog measures GUI event-loop lag with a heartbeat timer and prints
+# stalls longer than the threshold together with a stack sample of the GUI thread.
+WATCHDOG_ENABLED = True
+WATCHDOG_INTERVAL_MS = 50
+WATCHDOG_STALL_THRESHOLD_MS = 200
+
+# Sampling profiler, toggled with Ctrl+Shift+P (⌘+Shift+P on macOS)
+# Stacks of all threads are written in collapsed-stack format (*.folded),
+# which flamegraph.pl, speedscope and similar tools can read.
+PROFILER_INTERVAL_MS = 5
+PROFILER_OUTPUT_DIR = "."
+
+# Speculative processing configuration
+# When enabled, a low-priority request is sent as soon as the capture area shows
+# a new stable frame, before Process is pressed. Pressing Process on a
+# pixel-identical screen reuses the finished or in-flight answer instead of
+# starting a new request. The Flash Insight window itself is left out of the
+# comparison when it overlaps the capture area.
+SPECULATIVE_ENABLED = False
+
+# Consecutive preview ticks (1 per second) a frame must stay unchanged to be speculated on
+SPECULATIVE_STABLE_TICKS = 2
+
+# Maximum number of differing perceptual hash bits (out of 64) for a frame to
+# count as unchanged when detecting stability
+# - Answers are only reused for identical pixels, never for merely similar frames
+SPECULATIVE_HASH_DISTANCE = 4
+
+# Budget for wasted calls: speculation pauses once this many speculative results
+# went unused within the window (seconds)
+SPECULATIVE_WASTE_BUDGET = 10
+SPECULATIVE_WASTE_WINDOW = 600
+
 # Example modifications for different use cases:
 """
 # For more detailed explanations:
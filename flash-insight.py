@@ -4,9 +4,9 @@ import time
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QPushButton, QLabel, QLineEdit, QTextEdit, QMessageBox,
                             QGroupBox, QGridLayout, QSpinBox, QComboBox, QHBoxLayout,
-                            QDesktopWidget, QCheckBox, QSizePolicy)
+                            QDesktopWidget, QCheckBox, QSizePolicy, QShortcut)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QRect
-from PyQt5.QtGui import QPainter, QPen, QColor, QPixmap, QImage, QScreen
+from PyQt5.QtGui import QPainter, QPen, QColor, QPixmap, QImage, QScreen, QKeySequence
 import threading
 import mss
 import pytesseract
@@ -17,20 +17,25 @@ from dotenv import load_dotenv
 import numpy as np
 import io
 import re
-from config import GEMINI_PROMPT, GENERATION_CONFIG, MODEL_NAME
+import hashlib
+import queue
+import multiprocessing
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from config import (GEMINI_PROMPT, GENERATION_CONFIG, MODEL_NAME,
+                    ROUTER_ENABLED, ROUTER_MODELS, ROUTER_LATENCY_SLO,
+                    ROUTER_MAX_ERROR_RATE, ROUTER_PROBE_INTERVAL,
+                    OCR_ENABLED, OCR_MAX_BAND_HEIGHT, OCR_WORKERS,
+                    BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, BATCH_PROMPT,
+                    WATCHDOG_ENABLED, WATCHDOG_INTERVAL_MS, WATCHDOG_STALL_THRESHOLD_MS,
+                    PROFILER_INTERVAL_MS, PROFILER_OUTPUT_DIR,
+                    SPECULATIVE_ENABLED, SPECULATIVE_STABLE_TICKS, SPECULATIVE_HASH_DISTANCE,
+                    SPECULATIVE_WASTE_BUDGET, SPECULATIVE_WASTE_WINDOW)
+from ocr_worker import ocr_tile
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-if not GOOGLE_API_KEY:
-    raise ValueError("Please set GOOGLE_API_KEY in .env file")
-
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel(MODEL_NAME)
-# model = genai.GenerativeModel('gemini-2.0-pro-exp-02-05')
-
 def pil_image_to_qimage(pil_image):
     """Convert PIL Image to QImage."""
     # Convert PIL image to RGB if it's not
@@ -45,6 +50,646 @@ def pil_image_to_qimage(pil_image):
                    pil_image.size[0] * 3, QImage.Format_RGB888)
     return qimage
 
+# Names for threads not created through the threading module (e.g. QThreads)
+THREAD_NAMES = {}
+
+def register_thread(name):
+    """Name the calling thread in watchdog and profiler output."""
+    THREAD_NAMES[threading.get_ident()] = name
+
+def thread_name(ident):
+    if ident in THREAD_NAMES:
+        return THREAD_NAMES[ident]
+    for thread in threading.enumerate():
+        if thread.ident == ident:
+            return thread.name
+    return f"Thread-{ident}"
+
+def stack_snapshot(frame):
+    """Return a stack as raw (code, line) pairs, outermost first.
+
+    Only reads frame attributes, so it is cheap enough to call while sampling.
+    """
+    snapshot = []
+    while frame is not None:
+        snapshot.append((frame.f_code, frame.f_lineno))
+        frame = frame.f_back
+    snapshot.reverse()
+    return tuple(snapshot)
+
+def format_frames(snapshot):
+    """Format a stack snapshot as 'function (file:line)' entries."""
+    return [f"{code.co_name} ({os.path.basename(code.co_filename)}:{lineno})"
+            for code, lineno in snapshot]
+
+
+class EventLoopWatchdog:
+    """Detect GUI event-loop stalls and capture what the GUI thread was doing.
+
+    A Qt timer records a heartbeat on every tick; the delay beyond the timer
+    interval is the event-loop lag. A background thread notices when the
+    heartbeat stops and samples the GUI thread's stack while it is stuck.
+    """
+
+    def __init__(self, interval_ms, threshold_ms):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.main_ident = threading.main_thread().ident
+        self.lock = threading.Lock()
+        self.last_beat = time.perf_counter()
+        self.stall_sample = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.last_beat = time.perf_counter()
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.heartbeat)
+        self.timer.start(int(self.interval * 1000))
+        threading.Thread(target=self.watch, name="EventLoopWatchdog", daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        if hasattr(self, 'timer'):
+            self.timer.stop()
+
+    def heartbeat(self):
+        now = time.perf_counter()
+        with self.lock:
+            lag = now - self.last_beat - self.interval
+            self.last_beat = now
+            snapshot, self.stall_sample = self.stall_sample, None
+        if lag > self.threshold:
+            print(f"Event loop stalled for {lag * 1000:.0f} ms")
+            if snapshot:
+                print("GUI thread stack during stall:\n  " +
+                      "\n  ".join(format_frames(snapshot)))
+
+    def watch(self):
+        while self.running:
+            time.sleep(self.interval)
+            with self.lock:
+                stalled = time.perf_counter() - self.last_beat > self.interval + self.threshold
+                if stalled and self.stall_sample is None:
+                    # Keep only the raw snapshot here; heartbeat formats it
+                    # after the stall, outside the lock
+                    frame = sys._current_frames().get(self.main_ident)
+                    if frame is not None:
+                        self.stall_sample = stack_snapshot(frame)
+
+
+class SamplingProfiler:
+    """Periodically sample the stacks of all threads into collapsed-stack counts.
+
+    Samples are counted as raw stack snapshots and only turned into text when
+    the profile is written, to keep the time spent holding the GIL small.
+    """
+
+    def __init__(self, interval_ms, output_dir):
+        self.interval = interval_ms / 1000
+        self.output_dir = output_dir
+        self.samples = Counter()
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        self.samples = Counter()
+        self.running = True
+        self.thread = threading.Thread(target=self.sample, name="SamplingProfiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop sampling and write the collapsed stacks; returns the file path."""
+        self.running = False
+        self.thread.join()
+        path = os.path.join(self.output_dir,
+                            time.strftime("profile-%Y%m%d-%H%M%S.folded"))
+        stacks = Counter()
+        for (name, snapshot), count in self.samples.items():
+            frames = [name] + format_frames(snapshot)
+            stacks[";".join(frame.replace(";", ":") for frame in frames)] += count
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def sample(self):
+        own_ident = threading.get_ident()
+        names = {}  # Thread names are looked up once per thread, not per sample
+        while self.running:
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if ident not in names:
+                    names[ident] = thread_name(ident)
+                self.samples[(names[ident], stack_snapshot(frame))] += 1
+            time.sleep(self.interval)
+
+
+def estimate_complexity(img, ocr_text=None):
+    """Estimate how demanding an image is to analyze, from 0.0 (trivial) to 1.0.
+
+    Uses cheap local signals only: image size, text density (share of strong
+    horizontal edges in a downscaled grayscale copy) and OCR length if known.
+    """
+    # Size: saturates at roughly a full 1080p capture
+    size_score = min(1.0, (img.size[0] * img.size[1]) / (1920 * 1080))
+
+    # Text density: text produces many sharp horizontal intensity changes
+    gray = np.asarray(img.convert("L").resize((256, 256)), dtype=np.int16)
+    edges = np.abs(np.diff(gray, axis=1)) > 40
+    density_score = min(1.0, edges.mean() * 5)
+
+    if ocr_text is None:
+        return 0.5 * size_score + 0.5 * density_score
+
+    # OCR length: saturates at roughly a paragraph of text
+    ocr_score = min(1.0, len(ocr_text.strip()) / 500)
+    return 0.3 * size_score + 0.3 * density_score + 0.4 * ocr_score
+
+
+class ModelRouter:
+    """Pick a Gemini model per request from live latency and error statistics.
+
+    Statistics are exponentially weighted moving averages kept per model. The
+    predicted latency of a model is its average latency scaled by how complex
+    the request is relative to the requests it has served so far.
+    """
+
+    SMOOTHING = 0.3  # Weight of the newest sample in the moving averages
+
+    def __init__(self, models, latency_slo, max_error_rate, probe_interval):
+        self.models = list(models)  # Ordered cheapest first
+        self.latency_slo = latency_slo
+        self.max_error_rate = max_error_rate
+        self.probe_interval = probe_interval
+        self.lock = threading.Lock()
+        self.clients = {}
+        self.stats = {
+            name: {
+                "latency": prior_latency,
+                "complexity": 0.5,
+                "error_rate": 0.0,
+                "samples": 0,
+                "last_used": time.time(),
+            }
+            for name, prior_latency in models.items()
+        }
+
+    def get_model(self, name):
+        """Return a (cached) GenerativeModel client for the given model name."""
+        with self.lock:
+            if name not in self.clients:
+                self.clients[name] = genai.GenerativeModel(name)
+            return self.clients[name]
+
+    def predict_latency(self, name, complexity):
+        stats = self.stats[name]
+        return stats["latency"] * (0.5 + complexity) / (0.5 + stats["complexity"])
+
+    def choose(self, complexity, override=None):
+        """Return the model name to use for a request of the given complexity."""
+        if override:
+            return override
+
+        now = time.time()
+        with self.lock:
+            predictions = {name: self.predict_latency(name, complexity)
+                           for name in self.models}
+            healthy = []
+            for name in self.models:
+                stats = self.stats[name]
+                # A failing model is given another try once its last attempt is
+                # old enough, but only if it would otherwise meet the SLO
+                if (stats["error_rate"] > self.max_error_rate and
+                        now - stats["last_used"] <= self.probe_interval):
+                    continue
+                healthy.append(name)
+                if predictions[name] <= self.latency_slo:
+                    return name
+            return min(healthy or self.models, key=predictions.get)
+
+    def record(self, name, latency, complexity, ok=True):
+        """Feed the outcome of a request back into the model statistics.
+
+        Pass latency=None to record only success or failure, e.g. for
+        multi-image requests whose latency is not comparable to single ones.
+        """
+        with self.lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                return  # Manual override outside the routed model set
+            alpha = self.SMOOTHING
+            stats["last_used"] = time.time()
+            stats["error_rate"] = (1 - alpha) * stats["error_rate"] + alpha * (0.0 if ok else 1.0)
+            if ok and latency is not None:
+                if stats["samples"] == 0:
+                    stats["latency"] = latency
+                    stats["complexity"] = complexity
+                else:
+                    stats["latency"] = (1 - alpha) * stats["latency"] + alpha * latency
+                    stats["complexity"] = (1 - alpha) * stats["complexity"] + alpha * complexity
+                stats["samples"] += 1
+
+
+def generate_answer(contents, complexity, model_override=None,
+                    generation_config=GENERATION_CONFIG, batch_size=1):
+    """Send a request to the routed Gemini model and return the raw response text."""
+    model_name = router.choose(complexity, override=model_override)
+    start_time = time.time()
+    try:
+        response = router.get_model(model_name).generate_content(
+            contents=contents,
+            generation_config=generation_config
+        )
+        
+        if not response.text:
+            raise ValueError("Empty response from Gemini API")
+    except Exception:
+        latency = time.time() - start_time
+        router.record(model_name, latency, complexity, ok=False)
+        print(f"Routing: model={model_name} complexity={complexity:.2f} "
+              f"images={batch_size} latency={latency:.2f}s failed")
+        raise
+    
+    latency = time.time() - start_time
+    # Batched latency would skew the single-request predictions, so only
+    # the outcome of multi-image requests is recorded
+    router.record(model_name, latency if batch_size == 1 else None, complexity)
+    print(f"Routing: model={model_name} complexity={complexity:.2f} "
+          f"images={batch_size} latency={latency:.2f}s")
+    return response.text
+
+
+class CaptureBatcher:
+    """Micro-batch pending captures into multi-image Gemini requests.
+
+    While other captures are queued or announced as being prepared, the first
+    queued capture waits up to max_wait_ms for them (or until max_batch_size
+    captures are pending), then the batch is sent as one request asking for
+    indexed answers. A lone capture is sent immediately. Captures whose answer
+    cannot be found in the response are retried with individual requests.
+    """
+
+    ANSWER_LINE = re.compile(r"^\s*(\d+)\s*[:.)\-]\s*(.+?)\s*$")
+
+    def __init__(self, max_batch_size, max_wait_ms):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.pending = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.lock = threading.Lock()
+        self.expected = 0  # Captures announced with expect() but not yet submitted
+        # Per mode: captures answered, API requests made, summed request time
+        self.stats = {
+            "batched": {"jobs": 0, "requests": 0, "busy": 0.0},
+            "single": {"jobs": 0, "requests": 0, "busy": 0.0},
+        }
+        threading.Thread(target=self.collect, name="CaptureBatcher", daemon=True).start()
+
+    def expect(self):
+        """Announce a capture that is being prepared so queued captures wait for it."""
+        with self.lock:
+            self.expected += 1
+
+    def withdraw(self):
+        """Cancel an announced capture that will not be submitted after all."""
+        with self.lock:
+            self.expected -= 1
+
+    def submit(self, img_bytes, complexity, model_override=None, expected=False):
+        """Queue a PNG capture and return a Future resolving to the answer text.
+
+        Pass expected=True if the capture was announced with expect().
+        """
+        future = Future()
+        with self.lock:
+            if expected:
+                self.expected -= 1
+            self.pending.put((img_bytes, complexity, model_override, future))
+        return future
+
+    def more_expected(self):
+        with self.lock:
+            return self.expected > 0 or not self.pending.empty()
+
+    def collect(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.time() + self.max_wait
+            while len(batch) < self.max_batch_size and self.more_expected():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Captures pinned to different models cannot share a request
+            groups = {}
+            for job in batch:
+                groups.setdefault(job[2], []).append(job)
+            for jobs in groups.values():
+                self.executor.submit(self.process, jobs)
+
+    def process(self, jobs):
+        if len(jobs) == 1:
+            self.process_single(jobs[0])
+            return
+
+        contents = [GEMINI_PROMPT + "\n\n" + BATCH_PROMPT.format(count=len(jobs))]
+        for index, (img_bytes, _, _, _) in enumerate(jobs, start=1):
+            contents.append(f"Image {index}:")
+            contents.append({"mime_type": "image/png", "data": img_bytes})
+        generation_config = dict(GENERATION_CONFIG)
+        generation_config["max_output_tokens"] = (
+            GENERATION_CONFIG.get("max_output_tokens", 20) * len(jobs))
+
+        complexity = max(job[1] for job in jobs)
+        start_time = time.time()
+        try:
+            text = generate_answer(contents, complexity, jobs[0][2], generation_config,
+                                   batch_size=len(jobs))
+        except Exception as e:
+            print(f"Batch of {len(jobs)} failed, retrying individually: {str(e)}")
+            text = ""
+        self.record("batched", 1, 0, time.time() - start_time)
+
+        answers = {}
+        for line in text.splitlines():
+            match = self.ANSWER_LINE.match(line)
+            if match:
+                answers.setdefault(int(match.group(1)), match.group(2))
+
+        for index, job in enumerate(jobs, start=1):
+            if index in answers:
+                self.record("batched", 0, 1, 0.0)
+                job[3].set_result(answers[index])
+            else:
+                self.executor.submit(self.process_single, job)
+
+    def process_single(self, job):
+        img_bytes, complexity, model_override, future = job
+        start_time = time.time()
+        try:
+            text = generate_answer(
+                [GEMINI_PROMPT, {"mime_type": "image/png", "data": img_bytes}],
+                complexity, model_override)
+        except Exception as e:
+            self.record("single", 1, 0, time.time() - start_time)
+            future.set_exception(e)
+            return
+        self.record("single", 1, 1, time.time() - start_time)
+        future.set_result(text)
+
+    def record(self, mode, requests, jobs, busy):
+        with self.lock:
+            stats = self.stats[mode]
+            stats["requests"] += requests
+            stats["jobs"] += jobs
+            stats["busy"] += busy
+
+    def report(self):
+        """Summarize throughput (captures per second of request time) per mode."""
+        with self.lock:
+            parts = []
+            for mode, stats in self.stats.items():
+                throughput = stats["jobs"] / stats["busy"] if stats["busy"] else 0.0
+                parts.append(f"{mode}: {stats['jobs']} captures in "
+                             f"{stats['requests']} requests, {throughput:.2f} captures/s")
+            return "Batching: " + "; ".join(parts)
+
+
+def perceptual_hash(img):
+    """Return a 64-bit difference hash that is stable under small pixel changes."""
+    gray = np.asarray(img.convert("L").resize((9, 8)), dtype=np.int16)
+    bits = (gray[:, 1:] > gray[:, :-1]).flatten()
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+def hash_distance(hash_a, hash_b):
+    return bin(hash_a ^ hash_b).count("1")
+
+def content_digest(img):
+    """Return an exact hash of the image pixels."""
+    return hashlib.blake2b(img.tobytes(), digest_size=16).digest()
+
+def mask_region(img, box):
+    """Return a copy of img with box (left, top, right, bottom) blacked out.
+
+    Used to leave Flash Insight's own window out of frame hashes: its status
+    label and preview change between a preview tick and Process.
+    """
+    if box is None:
+        return img
+    masked = img.copy()
+    masked.paste((0, 0, 0), box)
+    return masked
+
+
+class SpeculativeCache:
+    """Speculatively answer stable frames before Process is pressed.
+
+    Only one speculative request runs at a time so it never competes much with
+    user-triggered requests. Results are kept by exact content digest, so they
+    are only reused for pixel-identical frames; the perceptual hash is only
+    used to decide when a frame is stable. Entries evicted without being used
+    count against the waste budget.
+    """
+
+    MAX_ENTRIES = 4
+
+    def __init__(self, waste_budget, waste_window):
+        self.waste_budget = waste_budget
+        self.waste_window = waste_window
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # content digest -> entry
+        self.wasted = deque()  # Times at which unused results were evicted
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0.0
+
+    def speculate(self, digest, img, ocr_text=None):
+        """Submit a low-priority request for a stable frame if allowed."""
+        now = time.time()
+        with self.lock:
+            if digest in self.entries:
+                return
+            if any(not entry["future"].done() for entry in self.entries.values()):
+                return  # Keep at most one speculative request in flight
+            while self.wasted and now - self.wasted[0] > self.waste_window:
+                self.wasted.popleft()
+            unused = sum(1 for entry in self.entries.values() if not entry["used"])
+            if len(self.wasted) + unused >= self.waste_budget:
+                return
+
+            while len(self.entries) >= self.MAX_ENTRIES:
+                _, evicted = self.entries.popitem(last=False)
+                if not evicted["used"]:
+                    self.wasted.append(now)
+
+            entry = {"submitted": now, "completed": None, "used": False}
+            entry["future"] = self.executor.submit(self.run, entry, img, ocr_text)
+            self.entries[digest] = entry
+
+    def run(self, entry, img, ocr_text):
+        img_byte_arr = io.BytesIO()
+        img.save(img_byte_arr, format='PNG')
+        complexity = estimate_complexity(img, ocr_text)
+        try:
+            return generate_answer(
+                [GEMINI_PROMPT, {"mime_type": "image/png", "data": img_byte_arr.getvalue()}],
+                complexity, None if ROUTER_ENABLED else MODEL_NAME)
+        finally:
+            entry["completed"] = time.time()
+
+    def claim(self, digest):
+        """Return the speculative entry for identical frame content, marking it used, or None."""
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None or entry["used"]:
+                self.misses += 1
+                return None
+            entry["used"] = True
+            entry["claimed"] = time.time()
+            return entry
+
+    def record_hit(self, entry):
+        """Count a claimed entry whose result succeeded, with the latency it saved."""
+        with self.lock:
+            self.hits += 1
+            # Without speculation the request would only have started when claimed
+            self.saved += min(entry["completed"], entry["claimed"]) - entry["submitted"]
+
+    def record_miss(self):
+        """Count a claimed entry whose speculative request failed."""
+        with self.lock:
+            self.misses += 1
+
+    def report(self):
+        with self.lock:
+            total = self.hits + self.misses
+            hit_rate = self.hits / total * 100 if total else 0.0
+            avg_saved = self.saved / self.hits if self.hits else 0.0
+            return (f"Speculation: hit rate {hit_rate:.0f}% ({self.hits}/{total}), "
+                    f"avg latency saved {avg_saved:.2f}s, "
+                    f"{len(self.wasted)} wasted calls in the last {self.waste_window}s")
+
+
+class TileOCREngine:
+    """Incremental OCR that only re-recognizes tiles whose content changed.
+
+    Each frame is split into full-width row bands at rows with little or no
+    ink, measured as the number of sharp horizontal intensity changes in the
+    row. Bands taller than max_band_height are split at their lowest-ink row,
+    which may still cut through text in dense content. Text is cached by band
+    content hash and only new or changed bands are sent to the process pool.
+    """
+
+    EDGE_CONTRAST = 24  # Min intensity step between neighbouring pixels that counts as ink
+    BLANK_ROW_EDGES = 2  # Ink allowed above the background level in a blank row
+    BAND_MARGIN = 4  # Background rows kept around each band for Tesseract
+
+    def __init__(self, max_band_height, workers=None):
+        self.max_band_height = max_band_height
+        self.workers = workers
+        self.pool = None
+        self.band_text = {}  # band content hash -> recognized text
+
+    def get_pool(self):
+        if self.pool is None:
+            # Never fork: this process already runs Qt and several threads
+            self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return self.pool
+
+    def find_bands(self, gray):
+        """Return (top, bottom) row ranges of the content bands in a grayscale image."""
+        pixels = np.asarray(gray, dtype=np.int16)
+        ink = (np.abs(np.diff(pixels, axis=1)) > self.EDGE_CONTRAST).sum(axis=1)
+
+        # Elements spanning every row (window borders, scrollbars, sidebars)
+        # add a constant amount of ink; measure blank rows against that level
+        background = np.percentile(ink, 10)
+        has_ink = (ink > background + self.BLANK_ROW_EDGES).astype(np.int8)
+        edges = np.diff(np.concatenate(([0], has_ink, [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+
+        bands = []
+        half = self.max_band_height // 2
+        for top, bottom in zip(starts, ends):
+            # Split tall bands at the lowest-ink row in the lower half
+            while bottom - top > self.max_band_height:
+                window = ink[top + half:top + self.max_band_height]
+                cut = top + half + int(np.argmin(window))
+                bands.append((top, cut))
+                top = cut
+            bands.append((top, bottom))
+
+        height = pixels.shape[0]
+        return [(max(0, int(top) - self.BAND_MARGIN), min(height, int(bottom) + self.BAND_MARGIN))
+                for top, bottom in bands]
+
+    def recognize(self, img):
+        """Return the text of the whole image, re-running OCR on changed bands only."""
+        gray = img.convert("L")
+        width = gray.size[0]
+
+        bands = []
+        for top, bottom in self.find_bands(gray):
+            band = gray.crop((0, top, width, bottom))
+            band_bytes = band.tobytes()
+            digest = hashlib.blake2b(band_bytes, digest_size=16).digest()
+            bands.append((digest, band_bytes, band.size))
+
+        dirty = {digest: (band_bytes, size) for digest, band_bytes, size in bands
+                 if digest not in self.band_text}
+        if dirty:
+            texts = self.get_pool().map(ocr_tile,
+                                        [band_bytes for band_bytes, _ in dirty.values()],
+                                        [size for _, size in dirty.values()])
+            self.band_text.update(zip(dirty, texts))
+
+        # Forget bands that are no longer on screen, then merge top to bottom
+        self.band_text = {digest: self.band_text[digest] for digest, _, _ in bands}
+        return "\n".join(text for text in (self.band_text[digest] for digest, _, _ in bands)
+                         if text)
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
+
+
+class FrameAnalysisThread(QThread):
+    """Analyze a preview frame off the GUI thread: OCR and frame hashing."""
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+    hashed = pyqtSignal(object, object)  # Perceptual hash, content digest
+
+    def __init__(self, engine, img, generation, hash_frame=False, exclude=None):
+        super().__init__()
+        self.engine = engine  # None skips OCR
+        self.img = img
+        self.generation = generation  # Capture area version the frame belongs to
+        self.hash_frame = hash_frame
+        self.exclude = exclude  # Region left out of the frame hashes
+
+    def run(self):
+        register_thread("FrameAnalysisThread")
+        if self.hash_frame:
+            hashed_img = mask_region(self.img, self.exclude)
+            self.hashed.emit(perceptual_hash(hashed_img), content_digest(hashed_img))
+        if self.engine is None:
+            return
+        try:
+            self.finished.emit(self.engine.recognize(self.img))
+        except Exception as e:
+            print(f"Error in FrameAnalysisThread: {str(e)}")
+            self.error.emit(str(e))
+
 class ProcessingThread(QThread):
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
@@ -53,6 +698,11 @@ class ProcessingThread(QThread):
         super().__init__()
         self.capture_area = capture_area
         self.monitor_index = 1  # Default to primary monitor
+        # Force a specific model for this request, bypassing the router
+        self.model_override = None if ROUTER_ENABLED else MODEL_NAME
+        self.ocr_text = None  # Latest OCR text of the capture area, if available
+        self.speculative_hit = False
+        self.exclude = None  # Region left out when matching speculative results
 
     def image_to_bytes(self, img):
         """Convert PIL Image to bytes."""
@@ -62,6 +712,11 @@ class ProcessingThread(QThread):
         return img_byte_arr
 
     def run(self):
+        register_thread("ProcessingThread")
+        # Let captures that are already queued wait for this one to join them
+        announced = batcher is not None
+        if announced:
+            batcher.expect()
         try:
             with mss.mss() as sct:
                 # Capture the specified area with monitor index
@@ -86,23 +741,39 @@ class ProcessingThread(QThread):
                 if img.size[0] == 0 or img.size[1] == 0:
                     raise ValueError("Captured image is empty")
                 
-                # Convert image to bytes
-                img_bytes = self.image_to_bytes(img)
+                # Reuse a speculative answer for the same frame if there is one
+                text = None
+                entry = None
+                if SPECULATIVE_ENABLED:
+                    entry = speculator.claim(content_digest(mask_region(img, self.exclude)))
+                if entry is not None:
+                    try:
+                        text = entry["future"].result()
+                    except Exception as e:
+                        speculator.record_miss()
+                        print(f"Speculative request failed, processing normally: {str(e)}")
+                    else:
+                        speculator.record_hit(entry)
+                        self.speculative_hit = True
+                        print(speculator.report())
                 
-                # Process with Gemini
-                response = model.generate_content(
-                    contents=[
-                        GEMINI_PROMPT,
-                        {"mime_type": "image/png", "data": img_bytes}
-                    ],
-                    generation_config=GENERATION_CONFIG
-                )
-                
-                if not response.text:
-                    raise ValueError("Empty response from Gemini API")
+                if text is None:
+                    # Convert image to bytes
+                    img_bytes = self.image_to_bytes(img)
+                    
+                    # Process with Gemini, possibly batched with other pending captures
+                    complexity = estimate_complexity(img, self.ocr_text)
+                    if batcher is None:
+                        text = generate_answer(
+                            [GEMINI_PROMPT, {"mime_type": "image/png", "data": img_bytes}],
+                            complexity, self.model_override)
+                    else:
+                        announced = False
+                        text = batcher.submit(img_bytes, complexity, self.model_override,
+                                              expected=True).result()
                 
                 # Clean up and validate response
-                answer = response.text.strip().upper()
+                answer = text.strip().upper()
                 if not answer:
                     raise ValueError("Empty response from API")
                     
@@ -110,6 +781,9 @@ class ProcessingThread(QThread):
         except Exception as e:
             print(f"Error in ProcessingThread: {str(e)}")
             self.error.emit(str(e))
+        finally:
+            if announced:
+                batcher.withdraw()
 
 class SelectionOverlay(QWidget):
     def __init__(self, parent=None, screen_geometry=None):
@@ -241,6 +915,18 @@ class MainWindow(QMainWindow):
         self.capture_area = QRect(0, 0, screen.width(), screen.height())
         self.processing_thread = None
         
+        # Incremental OCR of the capture area, refreshed on every preview tick
+        # OCR text is only used for routing decisions
+        self.ocr_enabled = OCR_ENABLED and ROUTER_ENABLED
+        self.ocr_engine = TileOCREngine(OCR_MAX_BAND_HEIGHT, OCR_WORKERS)
+        self.analysis_thread = None
+        self.ocr_text = None
+        self.area_generation = 0  # Bumped whenever the capture area changes
+        
+        # Perceptual hash of the previous preview frame and how long it has been stable
+        self.frame_hash = None
+        self.stable_ticks = 0
+        
         # Get the total virtual desktop size across all monitors
         total_rect = QRect()
         for screen in QApplication.screens():
@@ -261,6 +947,15 @@ class MainWindow(QMainWindow):
         
         self.init_ui()
         self.start_preview_timer()
+        
+        # Responsiveness diagnostics
+        self.watchdog = EventLoopWatchdog(WATCHDOG_INTERVAL_MS, WATCHDOG_STALL_THRESHOLD_MS)
+        if WATCHDOG_ENABLED:
+            # Start once the event loop runs so startup isn't reported as a stall
+            QTimer.singleShot(0, self.watchdog.start)
+        self.profiler = SamplingProfiler(PROFILER_INTERVAL_MS, PROFILER_OUTPUT_DIR)
+        self.profiler_shortcut = QShortcut(QKeySequence("Ctrl+Shift+P"), self)
+        self.profiler_shortcut.activated.connect(self.toggle_profiler)
 
     def init_ui(self):
         central_widget = QWidget()
@@ -582,10 +1277,46 @@ class MainWindow(QMainWindow):
                     Qt.SmoothTransformation
                 )
                 self.preview_label.setPixmap(scaled_pixmap)
+                
+                # Refresh OCR text and frame hashes unless the previous pass is still running
+                if ((self.ocr_enabled or SPECULATIVE_ENABLED) and
+                        not (self.analysis_thread and self.analysis_thread.isRunning())):
+                    self.analysis_thread = FrameAnalysisThread(
+                        self.ocr_engine if self.ocr_enabled else None,
+                        img, self.area_generation, hash_frame=SPECULATIVE_ENABLED,
+                        exclude=self.own_window_box())
+                    self.analysis_thread.finished.connect(self.handle_ocr_result)
+                    self.analysis_thread.error.connect(self.handle_ocr_error)
+                    self.analysis_thread.hashed.connect(self.observe_frame)
+                    self.analysis_thread.start()
         except Exception as e:
             print(f"Preview error: {str(e)}")  # Debug print
             self.preview_label.setText(f"Preview error: {str(e)}")
 
+    def own_window_box(self):
+        """Return the part of this window inside the capture area, in image coordinates."""
+        overlap = self.frameGeometry().intersected(self.capture_area)
+        if overlap.isEmpty():
+            return None
+        left = overlap.x() - self.capture_area.x()
+        top = overlap.y() - self.capture_area.y()
+        return (left, top, left + overlap.width(), top + overlap.height())
+
+    def observe_frame(self, frame_hash, digest):
+        """Track frame stability and speculatively process newly stable frames."""
+        thread = self.sender()
+        if thread.generation != self.area_generation:
+            return
+        if (self.frame_hash is not None and
+                hash_distance(frame_hash, self.frame_hash) <= SPECULATIVE_HASH_DISTANCE):
+            self.stable_ticks += 1
+        else:
+            self.stable_ticks = 1
+        self.frame_hash = frame_hash
+        
+        if self.stable_ticks >= SPECULATIVE_STABLE_TICKS:
+            speculator.speculate(digest, thread.img, self.ocr_text)
+
     def update_capture_area(self):
         self.capture_area = QRect(
             self.left_spin.value(),
@@ -593,8 +1324,23 @@ class MainWindow(QMainWindow):
             self.width_spin.value(),
             self.height_spin.value()
         )
+        self.ocr_text = None  # Stale until the next OCR pass of the new area
+        self.area_generation += 1
+        self.frame_hash = None
+        self.stable_ticks = 0
         self.update_preview()
 
+    def handle_ocr_result(self, text):
+        # Ignore passes that started before the capture area changed
+        if self.sender().generation == self.area_generation:
+            self.ocr_text = text
+
+    def handle_ocr_error(self, error_msg):
+        # Most likely Tesseract is not installed; keep the app usable without OCR
+        print(f"Disabling OCR: {error_msg}")
+        self.ocr_enabled = False
+        self.ocr_text = None
+
     def process_capture(self):
         self.capture_btn.setEnabled(False)
         self.status_label.setText("Processing...")
@@ -610,6 +1356,8 @@ class MainWindow(QMainWindow):
         
         self.processing_thread = ProcessingThread(adjusted_area)
         self.processing_thread.monitor_index = 1  # Always use primary monitor
+        self.processing_thread.ocr_text = self.ocr_text
+        self.processing_thread.exclude = self.own_window_box()
         self.processing_thread.finished.connect(self.handle_result)
         self.processing_thread.error.connect(self.handle_error)
         self.processing_thread.start()
@@ -617,7 +1365,10 @@ class MainWindow(QMainWindow):
     def handle_result(self, result):
         self.result_text.setText(result)
         self.capture_btn.setEnabled(True)
-        self.status_label.setText("✅ Processing complete")
+        if self.processing_thread and self.processing_thread.speculative_hit:
+            self.status_label.setText("✅ Processing complete (speculative)")
+        else:
+            self.status_label.setText("✅ Processing complete")
         self.status_label.setStyleSheet("color: #4CAF50;")  # Green for success
 
     def handle_error(self, error_msg):
@@ -626,9 +1377,31 @@ class MainWindow(QMainWindow):
         self.status_label.setText("❌ Error occurred")
         self.status_label.setStyleSheet("color: #f44336;")  # Red for error
 
+    def toggle_profiler(self):
+        """Start or stop the sampling profiler."""
+        if self.profiler.running:
+            path = self.profiler.stop()
+            print(f"Profile written to {path}")
+            self.status_label.setText(f"Profile saved: {os.path.basename(path)}")
+            self.status_label.setStyleSheet("color: #86868b;")
+        else:
+            self.profiler.start()
+            self.status_label.setText("⏺ Profiling... (Ctrl+Shift+P to stop)")
+            self.status_label.setStyleSheet("color: #FFA500;")
+
     def closeEvent(self, event):
         if hasattr(self, 'preview_timer'):
             self.preview_timer.stop()
+        self.watchdog.stop()
+        if self.profiler.running:
+            print(f"Profile written to {self.profiler.stop()}")
+        if self.analysis_thread:
+            self.analysis_thread.wait()
+        self.ocr_engine.shutdown()
+        if batcher is not None:
+            print(batcher.report())
+        if SPECULATIVE_ENABLED:
+            print(speculator.report())
         event.accept()
 
     def start_area_selection(self):
@@ -680,6 +1453,22 @@ class MainWindow(QMainWindow):
         self.setFixedSize(380, base_height)
 
 if __name__ == '__main__':
+    # Process-wide setup lives here rather than at import time: OCR worker
+    # processes re-import this script when started with spawn (the macOS default)
+    
+    # Configure Gemini API
+    GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
+    if not GOOGLE_API_KEY:
+        raise ValueError("Please set GOOGLE_API_KEY in .env file")
+    
+    genai.configure(api_key=GOOGLE_API_KEY)
+    
+    router = ModelRouter(ROUTER_MODELS, ROUTER_LATENCY_SLO,
+                         ROUTER_MAX_ERROR_RATE, ROUTER_PROBE_INTERVAL)
+    # Batching is opt-in: requests go straight to Gemini unless BATCH_MAX_SIZE > 1
+    batcher = CaptureBatcher(BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS) if BATCH_MAX_SIZE > 1 else None
+    speculator = SpeculativeCache(SPECULATIVE_WASTE_BUDGET, SPECULATIVE_WASTE_WINDOW)
+    
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
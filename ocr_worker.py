@@ -0,0 +1,14 @@
+"""Tesseract worker for the incremental OCR process pool.
+
+This module is kept free of side effects so worker processes can import
+``ocr_tile`` without loading the GUI or configuring the Gemini client.
+"""
+
+import pytesseract
+from PIL import Image
+
+
+def ocr_tile(tile_bytes, size):
+    """Run Tesseract on a single grayscale tile (executed in a worker process)."""
+    tile = Image.frombytes("L", size, tile_bytes)
+    return pytesseract.image_to_string(tile).strip()